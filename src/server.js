@@ -1,8 +1,11 @@
 import childProcess from "node:child_process";
 import crypto from "node:crypto";
 import fs from "node:fs";
+import http from "node:http";
 import os from "node:os";
 import path from "node:path";
+import { Transform } from "node:stream";
+import { pipeline } from "node:stream/promises";
 
 import express from "express";
 import httpProxy from "http-proxy";
@@ -17,6 +20,15 @@ const GOOGLE_CALENDAR_MCP_DIR = "/data/google-calendar-mcp";
 const DEFAULT_GOOGLE_OAUTH_CLIENT_SECRET_PATH = `${GOOGLE_CALENDAR_MCP_DIR}/client_secret.json`;
 const DEFAULT_GOOGLE_OAUTH_TOKENS_PATH = `${GOOGLE_CALENDAR_MCP_DIR}/tokens.json`;
 
+// Resolved once at startup; the process env does not change these after boot.
+const GOOGLE_OAUTH_ENV = Object.freeze({
+  GOOGLE_OAUTH_CLIENT_SECRET_PATH:
+    process.env.GOOGLE_OAUTH_CLIENT_SECRET_PATH?.trim() ||
+    DEFAULT_GOOGLE_OAUTH_CLIENT_SECRET_PATH,
+  GOOGLE_OAUTH_TOKENS_PATH:
+    process.env.GOOGLE_OAUTH_TOKENS_PATH?.trim() || DEFAULT_GOOGLE_OAUTH_TOKENS_PATH,
+});
+
 function resolveGoogleCalendarMcpCommand() {
   // @cocal/google-calendar-mcp runs via npx.
   // We keep this centralized so tool wiring doesn't guess binary names.
@@ -127,8 +139,29 @@ function isConfigured() {
   }
 }
 
+// Env for every OpenClaw child process (gateway + one-shot CLI runs).
+function openclawChildEnv() {
+  return {
+    ...process.env,
+    OPENCLAW_STATE_DIR: STATE_DIR,
+    OPENCLAW_WORKSPACE_DIR: WORKSPACE_DIR,
+    // MCP servers/tools inherit env from the gateway process; provide stable default paths.
+    ...GOOGLE_OAUTH_ENV,
+  };
+}
+
+function configMtimeMs() {
+  try {
+    return fs.statSync(configPath()).mtimeMs;
+  } catch {
+    return null;
+  }
+}
+
 let gatewayProc = null;
 let gatewayStarting = null;
+// Config file mtime right after the Google Calendar MCP server was last written successfully.
+let googleCalendarMcpWiredAt = null;
 
 function sleep(ms) {
   return new Promise((r) => setTimeout(r, ms));
@@ -167,10 +200,14 @@ async function startGateway() {
 
   // Best-effort: keep Google Calendar MCP tool wiring present even for already-configured deployments
   // (no /setup rerun). Do not block startup yet.
-  try {
-    await configureGoogleCalendarMcpTool();
-  } catch (err) {
-    console.warn(`[google-calendar mcp] WARNING: failed to configure MCP tool on startup: ${String(err)}`);
+  // Skip the set+get round-trip when the config file is untouched since we last wired it
+  // (e.g. a plain gateway.restart, or an onboarding run with no channel tokens).
+  if (configMtimeMs() !== googleCalendarMcpWiredAt) {
+    try {
+      await configureGoogleCalendarMcpTool();
+    } catch (err) {
+      console.warn(`[google-calendar mcp] WARNING: failed to configure MCP tool on startup: ${String(err)}`);
+    }
   }
 
   const args = [
@@ -188,17 +225,7 @@ async function startGateway() {
 
   gatewayProc = childProcess.spawn(OPENCLAW_NODE, clawArgs(args), {
     stdio: "inherit",
-    env: {
-      ...process.env,
-      OPENCLAW_STATE_DIR: STATE_DIR,
-      OPENCLAW_WORKSPACE_DIR: WORKSPACE_DIR,
-      // MCP servers/tools inherit env from the gateway process; provide stable default paths.
-      GOOGLE_OAUTH_CLIENT_SECRET_PATH:
-        process.env.GOOGLE_OAUTH_CLIENT_SECRET_PATH?.trim() ||
-        DEFAULT_GOOGLE_OAUTH_CLIENT_SECRET_PATH,
-      GOOGLE_OAUTH_TOKENS_PATH:
-        process.env.GOOGLE_OAUTH_TOKENS_PATH?.trim() || DEFAULT_GOOGLE_OAUTH_TOKENS_PATH,
-    },
+    env: openclawChildEnv(),
   });
 
   gatewayProc.on("error", (err) => {
@@ -275,10 +302,16 @@ app.use(express.json({ limit: "1mb" }));
 // Minimal health endpoint for Railway.
 app.get("/setup/healthz", (_req, res) => res.json({ ok: true }));
 
+// The setup script ships with the image and never changes at runtime; read it once.
+let setupAppJs = null;
+
 app.get("/setup/app.js", requireSetupAuth, (_req, res) => {
   // Serve JS for /setup (kept external to avoid inline encoding/template issues)
+  if (setupAppJs === null) {
+    setupAppJs = fs.readFileSync(path.join(process.cwd(), "src", "setup-app.js"), "utf8");
+  }
   res.type("application/javascript");
-  res.send(fs.readFileSync(path.join(process.cwd(), "src", "setup-app.js"), "utf8"));
+  res.send(setupAppJs);
 });
 
 app.get("/setup", requireSetupAuth, (_req, res) => {
@@ -406,69 +439,87 @@ app.get("/setup", requireSetupAuth, (_req, res) => {
 </html>`);
 });
 
+// We reuse OpenClaw's own auth-choice grouping logic indirectly by hardcoding the same group defs.
+// This is intentionally minimal; later we can parse the CLI help output to stay perfectly in sync.
+const AUTH_GROUPS = Object.freeze([
+  { value: "openai", label: "OpenAI", hint: "Codex OAuth + API key", options: [
+    { value: "codex-cli", label: "OpenAI Codex OAuth (Codex CLI)" },
+    { value: "openai-codex", label: "OpenAI Codex (ChatGPT OAuth)" },
+    { value: "openai-api-key", label: "OpenAI API key" }
+  ]},
+  { value: "anthropic", label: "Anthropic", hint: "Claude Code CLI + API key", options: [
+    { value: "claude-cli", label: "Anthropic token (Claude Code CLI)" },
+    { value: "token", label: "Anthropic token (paste setup-token)" },
+    { value: "apiKey", label: "Anthropic API key" }
+  ]},
+  { value: "google", label: "Google", hint: "Gemini API key + OAuth", options: [
+    { value: "gemini-api-key", label: "Google Gemini API key" },
+    { value: "google-antigravity", label: "Google Antigravity OAuth" },
+    { value: "google-gemini-cli", label: "Google Gemini CLI OAuth" }
+  ]},
+  { value: "openrouter", label: "OpenRouter", hint: "API key", options: [
+    { value: "openrouter-api-key", label: "OpenRouter API key" }
+  ]},
+  { value: "ai-gateway", label: "Vercel AI Gateway", hint: "API key", options: [
+    { value: "ai-gateway-api-key", label: "Vercel AI Gateway API key" }
+  ]},
+  { value: "moonshot", label: "Moonshot AI", hint: "Kimi K2 + Kimi Code", options: [
+    { value: "moonshot-api-key", label: "Moonshot AI API key" },
+    { value: "kimi-code-api-key", label: "Kimi Code API key" }
+  ]},
+  { value: "zai", label: "Z.AI (GLM 4.7)", hint: "API key", options: [
+    { value: "zai-api-key", label: "Z.AI (GLM 4.7) API key" }
+  ]},
+  { value: "minimax", label: "MiniMax", hint: "M2.1 (recommended)", options: [
+    { value: "minimax-api", label: "MiniMax M2.1" },
+    { value: "minimax-api-lightning", label: "MiniMax M2.1 Lightning" }
+  ]},
+  { value: "qwen", label: "Qwen", hint: "OAuth", options: [
+    { value: "qwen-portal", label: "Qwen OAuth" }
+  ]},
+  { value: "copilot", label: "Copilot", hint: "GitHub + local proxy", options: [
+    { value: "github-copilot", label: "GitHub Copilot (GitHub device login)" },
+    { value: "copilot-proxy", label: "Copilot Proxy (local)" }
+  ]},
+  { value: "synthetic", label: "Synthetic", hint: "Anthropic-compatible (multi-model)", options: [
+    { value: "synthetic-api-key", label: "Synthetic API key" }
+  ]},
+  { value: "opencode-zen", label: "OpenCode Zen", hint: "API key", options: [
+    { value: "opencode-zen", label: "OpenCode Zen (multi-model proxy)" }
+  ]}
+].map((g) => Object.freeze({ ...g, options: Object.freeze(g.options.map((o) => Object.freeze(o))) })));
+
 app.get("/setup/api/status", requireSetupAuth, async (_req, res) => {
-  const version = await runCmd(OPENCLAW_NODE, clawArgs(["--version"]));
-  const channelsHelp = await runCmd(OPENCLAW_NODE, clawArgs(["channels", "add", "--help"]));
-
-  // We reuse OpenClaw's own auth-choice grouping logic indirectly by hardcoding the same group defs.
-  // This is intentionally minimal; later we can parse the CLI help output to stay perfectly in sync.
-  const authGroups = [
-    { value: "openai", label: "OpenAI", hint: "Codex OAuth + API key", options: [
-      { value: "codex-cli", label: "OpenAI Codex OAuth (Codex CLI)" },
-      { value: "openai-codex", label: "OpenAI Codex (ChatGPT OAuth)" },
-      { value: "openai-api-key", label: "OpenAI API key" }
-    ]},
-    { value: "anthropic", label: "Anthropic", hint: "Claude Code CLI + API key", options: [
-      { value: "claude-cli", label: "Anthropic token (Claude Code CLI)" },
-      { value: "token", label: "Anthropic token (paste setup-token)" },
-      { value: "apiKey", label: "Anthropic API key" }
-    ]},
-    { value: "google", label: "Google", hint: "Gemini API key + OAuth", options: [
-      { value: "gemini-api-key", label: "Google Gemini API key" },
-      { value: "google-antigravity", label: "Google Antigravity OAuth" },
-      { value: "google-gemini-cli", label: "Google Gemini CLI OAuth" }
-    ]},
-    { value: "openrouter", label: "OpenRouter", hint: "API key", options: [
-      { value: "openrouter-api-key", label: "OpenRouter API key" }
-    ]},
-    { value: "ai-gateway", label: "Vercel AI Gateway", hint: "API key", options: [
-      { value: "ai-gateway-api-key", label: "Vercel AI Gateway API key" }
-    ]},
-    { value: "moonshot", label: "Moonshot AI", hint: "Kimi K2 + Kimi Code", options: [
-      { value: "moonshot-api-key", label: "Moonshot AI API key" },
-      { value: "kimi-code-api-key", label: "Kimi Code API key" }
-    ]},
-    { value: "zai", label: "Z.AI (GLM 4.7)", hint: "API key", options: [
-      { value: "zai-api-key", label: "Z.AI (GLM 4.7) API key" }
-    ]},
-    { value: "minimax", label: "MiniMax", hint: "M2.1 (recommended)", options: [
-      { value: "minimax-api", label: "MiniMax M2.1" },
-      { value: "minimax-api-lightning", label: "MiniMax M2.1 Lightning" }
-    ]},
-    { value: "qwen", label: "Qwen", hint: "OAuth", options: [
-      { value: "qwen-portal", label: "Qwen OAuth" }
-    ]},
-    { value: "copilot", label: "Copilot", hint: "GitHub + local proxy", options: [
-      { value: "github-copilot", label: "GitHub Copilot (GitHub device login)" },
-      { value: "copilot-proxy", label: "Copilot Proxy (local)" }
-    ]},
-    { value: "synthetic", label: "Synthetic", hint: "Anthropic-compatible (multi-model)", options: [
-      { value: "synthetic-api-key", label: "Synthetic API key" }
-    ]},
-    { value: "opencode-zen", label: "OpenCode Zen", hint: "API key", options: [
-      { value: "opencode-zen", label: "OpenCode Zen (multi-model proxy)" }
-    ]}
-  ];
+  const [version, channelsHelp] = await Promise.all([
+    runVersionProbe(),
+    runCmd(OPENCLAW_NODE, clawArgs(["channels", "add", "--help"])),
+  ]);
 
   res.json({
     configured: isConfigured(),
     gatewayTarget: GATEWAY_TARGET,
     openclawVersion: version.output.trim(),
     channelsAddHelp: channelsHelp.output,
-    authGroups,
+    authGroups: AUTH_GROUPS,
   });
 });
 
+// Onboarding flag that carries the pasted secret, keyed by auth choice.
+const AUTH_SECRET_FLAGS = Object.freeze({
+  "openai-api-key": "--openai-api-key",
+  "apiKey": "--anthropic-api-key",
+  "openrouter-api-key": "--openrouter-api-key",
+  "ai-gateway-api-key": "--ai-gateway-api-key",
+  "moonshot-api-key": "--moonshot-api-key",
+  "kimi-code-api-key": "--kimi-code-api-key",
+  "gemini-api-key": "--gemini-api-key",
+  "zai-api-key": "--zai-api-key",
+  "minimax-api": "--minimax-api-key",
+  "minimax-api-lightning": "--minimax-api-key",
+  "synthetic-api-key": "--synthetic-api-key",
+  "opencode-zen": "--opencode-zen-api-key"
+});
+
 function buildOnboardArgs(payload) {
   const args = [
     "onboard",
@@ -497,21 +548,9 @@ function buildOnboardArgs(payload) {
 
     // Map secret to correct flag for common choices.
     const secret = (payload.authSecret || "").trim();
-    const map = {
-      "openai-api-key": "--openai-api-key",
-      "apiKey": "--anthropic-api-key",
-      "openrouter-api-key": "--openrouter-api-key",
-      "ai-gateway-api-key": "--ai-gateway-api-key",
-      "moonshot-api-key": "--moonshot-api-key",
-      "kimi-code-api-key": "--kimi-code-api-key",
-      "gemini-api-key": "--gemini-api-key",
-      "zai-api-key": "--zai-api-key",
-      "minimax-api": "--minimax-api-key",
-      "minimax-api-lightning": "--minimax-api-key",
-      "synthetic-api-key": "--synthetic-api-key",
-      "opencode-zen": "--opencode-zen-api-key"
-    };
-    const flag = map[payload.authChoice];
+    const flag = Object.hasOwn(AUTH_SECRET_FLAGS, payload.authChoice)
+      ? AUTH_SECRET_FLAGS[payload.authChoice]
+      : undefined;
     if (flag && secret) {
       args.push(flag, secret);
     }
@@ -529,16 +568,7 @@ function runCmd(cmd, args, opts = {}) {
   return new Promise((resolve) => {
     const proc = childProcess.spawn(cmd, args, {
       ...opts,
-      env: {
-        ...process.env,
-        OPENCLAW_STATE_DIR: STATE_DIR,
-        OPENCLAW_WORKSPACE_DIR: WORKSPACE_DIR,
-        GOOGLE_OAUTH_CLIENT_SECRET_PATH:
-          process.env.GOOGLE_OAUTH_CLIENT_SECRET_PATH?.trim() ||
-          DEFAULT_GOOGLE_OAUTH_CLIENT_SECRET_PATH,
-        GOOGLE_OAUTH_TOKENS_PATH:
-          process.env.GOOGLE_OAUTH_TOKENS_PATH?.trim() || DEFAULT_GOOGLE_OAUTH_TOKENS_PATH,
-      },
+      env: openclawChildEnv(),
     });
 
     let out = "";
@@ -554,6 +584,22 @@ function runCmd(cmd, args, opts = {}) {
   });
 }
 
+// `openclaw --version` reports the CLI built into the image, so memoize a successful result
+// instead of spawning node on every status load. (Anything that reads config or plugins under
+// STATE_DIR, like `channels add --help`, can change at runtime and must not be cached.)
+let versionProbe = null;
+
+function runVersionProbe() {
+  if (!versionProbe) {
+    versionProbe = runCmd(OPENCLAW_NODE, clawArgs(["--version"])).then((r) => {
+      // Don't pin failures; let the next caller retry.
+      if (r.code !== 0) versionProbe = null;
+      return r;
+    });
+  }
+  return versionProbe;
+}
+
 async function configureGoogleCalendarMcpTool() {
   // Wire Google Calendar as an MCP tool/server (replaces the legacy non-MCP integration path).
   // Best-effort: attempt multiple config paths to match the installed OpenClaw version.
@@ -561,13 +607,7 @@ async function configureGoogleCalendarMcpTool() {
   const serverDef = {
     command: mcp.command,
     args: mcp.args,
-    env: {
-      GOOGLE_OAUTH_CLIENT_SECRET_PATH:
-        process.env.GOOGLE_OAUTH_CLIENT_SECRET_PATH?.trim() ||
-        DEFAULT_GOOGLE_OAUTH_CLIENT_SECRET_PATH,
-      GOOGLE_OAUTH_TOKENS_PATH:
-        process.env.GOOGLE_OAUTH_TOKENS_PATH?.trim() || DEFAULT_GOOGLE_OAUTH_TOKENS_PATH,
-    },
+    env: { ...GOOGLE_OAUTH_ENV },
   };
 
   const candidates = [
@@ -583,6 +623,7 @@ async function configureGoogleCalendarMcpTool() {
     );
     if (set.code === 0) {
       const verify = await runCmd(OPENCLAW_NODE, clawArgs(["config", "get", p]));
+      googleCalendarMcpWiredAt = configMtimeMs();
       return { ok: true, path: p, set, verify };
     }
   }
@@ -691,8 +732,10 @@ app.post("/setup/api/run", requireSetupAuth, async (req, res) => {
 });
 
 app.get("/setup/api/debug", requireSetupAuth, async (_req, res) => {
-  const v = await runCmd(OPENCLAW_NODE, clawArgs(["--version"]));
-  const help = await runCmd(OPENCLAW_NODE, clawArgs(["channels", "add", "--help"]));
+  const [v, help] = await Promise.all([
+    runCmd(OPENCLAW_NODE, clawArgs(["--version"])),
+    runCmd(OPENCLAW_NODE, clawArgs(["channels", "add", "--help"])),
+  ]);
   res.json({
     wrapper: {
       node: process.version,
@@ -715,14 +758,20 @@ app.get("/setup/api/debug", requireSetupAuth, async (_req, res) => {
 
 // --- Debug console (Option A: allowlisted commands + config editor) ---
 
+// Built once at module load; redactSecrets runs over every console command's output.
+const SECRET_PATTERNS = [
+  /(sk-[A-Za-z0-9_-]{10,})/g,
+  /(gho_[A-Za-z0-9_]{10,})/g,
+  /(xox[baprs]-[A-Za-z0-9-]{10,})/g,
+  /(AA[A-Za-z0-9_-]{10,}:\S{10,})/g,
+];
+
 function redactSecrets(text) {
   if (!text) return text;
   // Very small best-effort redaction. (Config paths/values may still contain secrets.)
-  return String(text)
-    .replace(/(sk-[A-Za-z0-9_-]{10,})/g, "[REDACTED]")
-    .replace(/(gho_[A-Za-z0-9_]{10,})/g, "[REDACTED]")
-    .replace(/(xox[baprs]-[A-Za-z0-9-]{10,})/g, "[REDACTED]")
-    .replace(/(AA[A-Za-z0-9_-]{10,}:\S{10,})/g, "[REDACTED]");
+  let out = String(text);
+  for (const re of SECRET_PATTERNS) out = out.replace(re, "[REDACTED]");
+  return out;
 }
 
 const ALLOWED_CONSOLE_COMMANDS = new Set([
@@ -927,22 +976,18 @@ function looksSafeTarPath(p) {
   return true;
 }
 
-async function readBodyBuffer(req, maxBytes) {
-  return new Promise((resolve, reject) => {
-    const chunks = [];
-    let total = 0;
-    req.on("data", (chunk) => {
+// Stream the request body straight to disk so large uploads never sit in memory.
+async function writeBodyToFile(req, filePath, maxBytes) {
+  let total = 0;
+  const limit = new Transform({
+    transform(chunk, _enc, cb) {
       total += chunk.length;
-      if (total > maxBytes) {
-        reject(new Error("payload too large"));
-        req.destroy();
-        return;
-      }
-      chunks.push(chunk);
-    });
-    req.on("end", () => resolve(Buffer.concat(chunks)));
-    req.on("error", reject);
+      if (total > maxBytes) return cb(new Error("payload too large"));
+      return cb(null, chunk);
+    },
   });
+  await pipeline(req, limit, fs.createWriteStream(filePath, { mode: 0o600 }));
+  return total;
 }
 
 // Import a backup created by /setup/export.
@@ -964,28 +1009,28 @@ app.post("/setup/import", requireSetupAuth, async (req, res) => {
       gatewayProc = null;
     }
 
-    const buf = await readBodyBuffer(req, 250 * 1024 * 1024); // 250MB max
-    if (!buf.length) return res.status(400).type("text/plain").send("Empty body\n");
-
-    // Extract into /data.
-    // We only allow safe relative paths, and we intentionally do NOT delete existing files.
-    // (Users can reset/redeploy or manually clean the volume if desired.)
     const tmpPath = path.join(os.tmpdir(), `openclaw-import-${Date.now()}.tar.gz`);
-    fs.writeFileSync(tmpPath, buf);
-
-    await tar.x({
-      file: tmpPath,
-      cwd: dataRoot,
-      gzip: true,
-      strict: true,
-      onwarn: () => {},
-      filter: (p) => {
-        // Allow only paths that look safe.
-        return looksSafeTarPath(p);
-      },
-    });
-
-    try { fs.rmSync(tmpPath, { force: true }); } catch {}
+    try {
+      const bytes = await writeBodyToFile(req, tmpPath, 250 * 1024 * 1024); // 250MB max
+      if (!bytes) return res.status(400).type("text/plain").send("Empty body\n");
+
+      // Extract into /data.
+      // We only allow safe relative paths, and we intentionally do NOT delete existing files.
+      // (Users can reset/redeploy or manually clean the volume if desired.)
+      await tar.x({
+        file: tmpPath,
+        cwd: dataRoot,
+        gzip: true,
+        strict: true,
+        onwarn: () => {},
+        filter: (p) => {
+          // Allow only paths that look safe.
+          return looksSafeTarPath(p);
+        },
+      });
+    } finally {
+      await fs.promises.rm(tmpPath, { force: true }).catch(() => {});
+    }
 
     // Restart gateway after restore.
     if (isConfigured()) {
@@ -1000,6 +1045,9 @@ app.post("/setup/import", requireSetupAuth, async (req, res) => {
 });
 
 // Proxy everything else to the gateway.
+// Reuse loopback sockets between requests instead of opening a new connection each time.
+const gatewayAgent = new http.Agent({ keepAlive: true, maxFreeSockets: 16 });
+
 const proxy = httpProxy.createProxyServer({
   target: GATEWAY_TARGET,
   ws: true,
@@ -1011,12 +1059,15 @@ proxy.on("error", (err, _req, _res) => {
 });
 
 app.use(async (req, res) => {
+  // Every proxied request lands here; stat the config file once per request, not twice.
+  const configured = isConfigured();
+
   // If not configured, force users to /setup for any non-setup routes.
-  if (!isConfigured() && !req.path.startsWith("/setup")) {
+  if (!configured && !req.path.startsWith("/setup")) {
     return res.redirect("/setup");
   }
 
-  if (isConfigured()) {
+  if (configured) {
     try {
       await ensureGatewayRunning();
     } catch (err) {
@@ -1024,7 +1075,7 @@ app.use(async (req, res) => {
     }
   }
 
-  return proxy.web(req, res, { target: GATEWAY_TARGET });
+  return proxy.web(req, res, { target: GATEWAY_TARGET, agent: gatewayAgent });
 });
 
 const server = app.listen(PORT, "0.0.0.0", () => {